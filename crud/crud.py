@@ -1,11 +1,27 @@
 from fastapi import HTTPException
-from sqlalchemy import func
+from sqlalchemy import case, func
 
 from sqlalchemy.orm import Session, aliased
-from datetime import date, datetime, timedelta
-from collections import defaultdict
+from datetime import datetime, timedelta
 from models.models import Category, Inventory, InventoryChangeLog, Sale, Product
-from utils.utilities import get_interval_duration_and_format
+from utils.bucketing import (
+    BUCKET_INTERVALS,
+    bucket_edges,
+    bucket_labels,
+    clip_edges,
+    local_midnight_utc,
+    local_today,
+    localize_edges,
+    sum_by_bucket,
+)
+from utils.leaderboard import (
+    LEADERBOARD_METRICS,
+    LEADERBOARD_WINDOWS,
+    sales_leaderboard,
+)
+from utils.utilities import utc_now
+
+VELOCITY_WINDOWS = (7, 30, 90)
 
 
 def get_product_by_name(db: Session, product_name: str):
@@ -72,72 +88,421 @@ def get_sales_data(
     return result
 
 
-def calculate_revenue_by_interval(
+def record_sale(db: Session, product_name: str, quantity_sold: int):
+    product = get_product_by_name(db, product_name)
+
+    if quantity_sold <= 0:
+        raise HTTPException(
+            status_code=400, detail="Quantity sold must be a positive number"
+        )
+
+    if not product.inventory:
+        raise HTTPException(
+            status_code=400, detail="Not enough stock to record this sale"
+        )
+
+    inventory_id = product.inventory[0].id
+    category_name = product.category.name
+    revenue = quantity_sold * product.price
+
+    # Check and decrement in one statement so concurrent sales cannot both
+    # pass the stock check or overwrite each other's decrement.
+    updated_rows = (
+        db.query(Inventory)
+        .filter(
+            Inventory.id == inventory_id,
+            Inventory.current_stock >= quantity_sold,
+        )
+        .update(
+            {Inventory.current_stock: Inventory.current_stock - quantity_sold},
+            synchronize_session=False,
+        )
+    )
+    if updated_rows == 0:
+        db.rollback()
+        raise HTTPException(
+            status_code=400, detail="Not enough stock to record this sale"
+        )
+
+    new_quantity = (
+        db.query(Inventory.current_stock).filter(Inventory.id == inventory_id).scalar()
+    )
+
+    sale_timestamp = utc_now()
+    sale = Sale(
+        product_id=product.id,
+        sale_timestamp=sale_timestamp,
+        quantity_sold=quantity_sold,
+    )
+
+    change_log = InventoryChangeLog(
+        product_id=product.id,
+        quantity_change=-quantity_sold,
+        timestamp=sale_timestamp,
+        new_quantity=new_quantity,
+    )
+
+    db.add(sale)
+    db.add(change_log)
+    db.flush()
+    sale_id = sale.id
+
+    db.commit()
+
+    sales_leaderboard.record_sale(
+        sale_id,
+        sale_timestamp,
+        product_name,
+        category_name,
+        quantity_sold,
+        revenue,
+    )
+
+    return {
+        "sale_date": sale_timestamp.strftime("%m/%d/%Y, %H:%M:%S"),
+        "product_name": product_name,
+        "quantity_sold": quantity_sold,
+    }
+
+
+def sync_sales_leaderboard(db: Session):
+    now = utc_now()
+
+    def load_sales(last_sale_id):
+        high_water_id = db.query(func.max(Sale.id)).scalar() or 0
+
+        query = (
+            db.query(
+                Sale.id,
+                Sale.sale_timestamp,
+                Product.name,
+                Category.name,
+                Sale.quantity_sold,
+                Product.price,
+            )
+            .join(Product, Sale.product_id == Product.id)
+            .join(Category, Product.category_id == Category.id)
+            .filter(Sale.id <= high_water_id)
+        )
+
+        # Cold start reads the last 24h through the timestamp index; after
+        # that only sales newer than the last one seen, through the primary key.
+        if last_sale_id is None:
+            query = query.filter(Sale.sale_timestamp > now - timedelta(hours=24))
+        else:
+            query = query.filter(Sale.id > last_sale_id)
+
+        rows = [
+            (sale_id, timestamp, product, category, quantity, quantity * price)
+            for sale_id, timestamp, product, category, quantity, price in query
+        ]
+        return rows, high_water_id
+
+    sales_leaderboard.sync(load_sales, now)
+
+
+def get_top_sellers(
     db: Session,
-    start_date: str = "2020-01-01",
-    end_date: str = date.today(),
-    interval: str = "annual",
+    metric: str = "units",
+    group_by: str = "product",
+    window: str = None,
+    start_date: str = None,
+    end_date: str = None,
     category_name: str = None,
+    per_category: bool = False,
+    limit: int = 10,
+    tz_name: str = "UTC",
 ):
-    start_datetime = datetime.strptime(start_date, "%Y-%m-%d")
-    end_datetime = datetime.strptime(end_date, "%Y-%m-%d")
+    if metric not in LEADERBOARD_METRICS:
+        raise HTTPException(
+            status_code=400, detail="Invalid metric. Allowed values: units, revenue"
+        )
 
-    interval_duration, interval_format = get_interval_duration_and_format(interval)
+    if group_by not in ("product", "category"):
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid group_by. Allowed values: product, category",
+        )
 
-    if not (interval_duration or interval_format):
+    if window is not None and window not in LEADERBOARD_WINDOWS:
+        raise HTTPException(
+            status_code=400, detail="Invalid window. Allowed values: today, last_24h"
+        )
+
+    if window is not None and (start_date or end_date):
         raise HTTPException(
             status_code=400,
-            detail="Invalid basis. Allowed values: daily, weekly, monthly, annual",
+            detail="window cannot be combined with start_date or end_date",
+        )
+
+    if bool(start_date) != bool(end_date):
+        raise HTTPException(
+            status_code=400, detail="start_date and end_date must be given together"
         )
 
-    revenue_per_interval = defaultdict(float)
-    total_revenue = 0.0
+    if category_name is not None:
+        get_category_id_by_name(db, category_name)
 
+    range_start = range_end = None
     if start_date and end_date:
-        current_datetime = start_datetime
-        while current_datetime <= end_datetime:
-            next_datetime = current_datetime + interval_duration
-            if next_datetime.year % 4 == 0:
-                next_datetime += timedelta(days=1)
-            if next_datetime > end_datetime:
-                break
-
-            query = db.query(Sale).filter(
-                func.DATE(Sale.sale_timestamp) >= current_datetime,
-                func.DATE(Sale.sale_timestamp) < next_datetime,
+        range_start = local_midnight_utc(
+            datetime.strptime(start_date, "%Y-%m-%d").date(), tz_name
+        )
+        range_end = local_midnight_utc(
+            datetime.strptime(end_date, "%Y-%m-%d").date() + timedelta(days=1),
+            tz_name,
+        )
+    elif window == "today" and tz_name != "UTC":
+        # The live "today" window follows the UTC day; a local day is ranked
+        # in SQL over the timestamp index instead.
+        range_start = local_midnight_utc(local_today(tz_name), tz_name)
+    elif window is not None:
+        sync_sales_leaderboard(db)
+        return sales_leaderboard.top(
+            window,
+            metric,
+            limit,
+            group_by=group_by,
+            category=category_name,
+            per_category=per_category,
+        )
+
+    units = func.sum(Sale.quantity_sold)
+    revenue = func.sum(Sale.quantity_sold * Product.price)
+    score = units if metric == "units" else revenue
+    name = Product.name if group_by == "product" else Category.name
+
+    ranked = (
+        db.query(
+            name.label("name"),
+            Category.name.label("category_name"),
+            units.label("units_sold"),
+            revenue.label("revenue"),
+            func.row_number()
+            .over(
+                partition_by=Category.name if per_category else None,
+                order_by=score.desc(),
             )
+            .label("rank"),
+        )
+        .select_from(Sale)
+        .join(Product, Sale.product_id == Product.id)
+        .join(Category, Product.category_id == Category.id)
+    )
+
+    if range_start is not None:
+        ranked = ranked.filter(Sale.sale_timestamp >= range_start)
+    if range_end is not None:
+        ranked = ranked.filter(Sale.sale_timestamp < range_end)
+
+    if category_name is not None:
+        ranked = ranked.filter(Category.name == category_name)
 
-            if category_name is not None:
-                category_id = get_category_id_by_name(db, category_name)
-                query = query.join(Sale.product).filter(
-                    Product.category_id == category_id
+    ranked = ranked.group_by(name, Category.name).subquery()
+
+    query = db.query(ranked).filter(ranked.c.rank <= limit)
+    if per_category:
+        query = query.order_by(ranked.c.category_name)
+
+    leaders = query.order_by(ranked.c.rank).all()
+
+    return [
+        {
+            "rank": leader.rank,
+            "name": leader.name,
+            "category_name": leader.category_name,
+            "units_sold": leader.units_sold,
+            "revenue": leader.revenue,
+        }
+        for leader in leaders
+    ]
+
+
+def get_sales_velocity(
+    db: Session,
+    as_of_date: str = None,
+    window: int = 30,
+    category_name: str = None,
+    tz_name: str = "UTC",
+):
+    if window not in VELOCITY_WINDOWS:
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid window. Allowed values: 7, 30, 90",
+        )
+
+    as_of_day = (
+        datetime.strptime(as_of_date, "%Y-%m-%d").date()
+        if as_of_date
+        else local_today(tz_name)
+    )
+    as_of = datetime.combine(as_of_day, datetime.min.time())
+
+    # Windows end at local midnight after as_of_day, as stored UTC instants.
+    end_day = as_of_day + timedelta(days=1)
+    end_datetime = local_midnight_utc(end_day, tz_name)
+    cutoffs = {
+        days: local_midnight_utc(end_day - timedelta(days=days), tz_name)
+        for days in VELOCITY_WINDOWS
+    }
+
+    # One grouped scan over the widest window; the narrower windows are
+    # conditional sums over the same rows.
+    sales_totals = (
+        db.query(
+            Sale.product_id,
+            *[
+                func.sum(
+                    case(
+                        (Sale.sale_timestamp >= cutoffs[days], Sale.quantity_sold),
+                        else_=0,
+                    )
+                ).label(f"units_{days}d")
+                for days in VELOCITY_WINDOWS
+            ],
+        )
+        .filter(
+            Sale.sale_timestamp >= cutoffs[max(VELOCITY_WINDOWS)],
+            Sale.sale_timestamp < end_datetime,
+        )
+        .group_by(Sale.product_id)
+        .subquery()
+    )
+
+    # Products without an inventory row have no stock to forecast; products
+    # with several rows use the first one, like the rest of this module.
+    first_inventory = (
+        db.query(func.min(Inventory.id).label("id"))
+        .group_by(Inventory.product_id)
+        .subquery()
+    )
+
+    query = (
+        db.query(
+            Product.id,
+            Product.name,
+            Inventory.current_stock,
+            *[
+                func.coalesce(sales_totals.c[f"units_{days}d"], 0).label(
+                    f"units_{days}d"
                 )
+                for days in VELOCITY_WINDOWS
+            ],
+        )
+        .join(Inventory, Inventory.product_id == Product.id)
+        .join(first_inventory, first_inventory.c.id == Inventory.id)
+        .outerjoin(sales_totals, sales_totals.c.product_id == Product.id)
+    )
 
-            sales = query.all()
-            interval_revenue = sum(
-                sale.quantity_sold * sale.product.price for sale in sales
-            )
+    if category_name is not None:
+        category_id = get_category_id_by_name(db, category_name)
+        query = query.filter(Product.category_id == category_id)
 
-            interval_label = (
-                current_datetime.strftime(interval_format)
-                + " - "
-                + next_datetime.strftime(interval_format)
-            )
+    result = []
+    for row in query.all():
+        velocities = {
+            days: getattr(row, f"units_{days}d") / days for days in VELOCITY_WINDOWS
+        }
+        velocity = velocities[window]
+        # A NULL stock level is reported as 0 rather than failing the response.
+        current_stock = row.current_stock or 0
+        available_stock = max(current_stock, 0)
+
+        if available_stock == 0:
+            days_remaining = 0.0
+        elif velocity > 0:
+            days_remaining = available_stock / velocity
+        else:
+            days_remaining = None
+
+        stock_out_date = (
+            (as_of + timedelta(days=days_remaining)).strftime("%Y-%m-%d")
+            if days_remaining is not None
+            else None
+        )
 
-            revenue_per_interval[interval_label] += interval_revenue
+        result.append(
+            {
+                "product_id": row.id,
+                "product_name": row.name,
+                "current_stock": current_stock,
+                "velocity_7d": velocities[7],
+                "velocity_30d": velocities[30],
+                "velocity_90d": velocities[90],
+                "days_of_stock_remaining": days_remaining,
+                "projected_stock_out_date": stock_out_date,
+            }
+        )
+
+    # Most urgent first; products that are not selling go last.
+    result.sort(
+        key=lambda item: (
+            item["days_of_stock_remaining"] is None,
+            item["days_of_stock_remaining"] or 0.0,
+        )
+    )
+
+    return result
+
+
+def calculate_revenue_by_interval(
+    db: Session,
+    start_date: str = "2020-01-01",
+    end_date: str = None,
+    interval: str = "annual",
+    category_name: str = None,
+    tz_name: str = "UTC",
+):
+    if interval not in BUCKET_INTERVALS:
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid basis. Allowed values: "
+            "daily, weekly, monthly, quarterly, annual",
+        )
+
+    start_day = datetime.strptime(start_date, "%Y-%m-%d").date()
+    end_day = (
+        datetime.strptime(end_date, "%Y-%m-%d").date()
+        if end_date
+        else local_today(tz_name)
+    )
+
+    if start_day > end_day:
+        raise HTTPException(
+            status_code=400, detail="start_date must not be after end_date"
+        )
+
+    edges = bucket_edges(start_day, end_day, interval)
+    labels = bucket_labels(edges, interval)
+    instants = localize_edges(clip_edges(edges, start_day, end_day), tz_name)
+
+    query = (
+        db.query(Sale.sale_timestamp, Sale.quantity_sold * Product.price)
+        .join(Product, Sale.product_id == Product.id)
+        .filter(
+            Sale.sale_timestamp >= instants[0].astype(datetime),
+            Sale.sale_timestamp < instants[-1].astype(datetime),
+        )
+    )
+
+    if category_name is not None:
+        category_id = get_category_id_by_name(db, category_name)
+        query = query.filter(Product.category_id == category_id)
 
-            total_revenue += interval_revenue
+    sales = query.all()
+    timestamps = [timestamp for timestamp, _ in sales]
+    amounts = [amount for _, amount in sales]
 
-            current_datetime = next_datetime
+    revenue = sum_by_bucket(timestamps, amounts, instants)
+    total_revenue = float(revenue.sum())
 
-    if start_datetime and end_datetime:
-        duration_days = (end_datetime - start_datetime).days + 1
-        average_revenue = total_revenue / duration_days
-    else:
-        average_revenue = 0.0
+    duration_days = (end_day - start_day).days + 1
+    average_revenue = total_revenue / duration_days
 
     return {
-        "revenue_per_interval": dict(revenue_per_interval),
+        "revenue_per_interval": {
+            label: float(amount) for label, amount in zip(labels, revenue)
+        },
         "average_revenue": average_revenue,
     }
 
@@ -172,7 +537,7 @@ def update_inventory(db: Session, product_name: str, quantity_to_add: int):
     change_log = InventoryChangeLog(
         product_id=product.id,
         quantity_change=quantity_to_add,
-        timestamp=datetime.now(),
+        timestamp=utc_now(),
         new_quantity=new_quantity,
     )
 
@@ -1,9 +1,11 @@
+import os
+
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 
 # Create an SQLite database
-DATABASE_URL = "sqlite:///_ecommerce.db"
+DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///_ecommerce.db")
 engine = create_engine(DATABASE_URL)
 
 Base = declarative_base()
@@ -1,13 +1,15 @@
 from typing import Annotated
 from fastapi import Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from datetime import date
 from crud.crud import (
     calculate_revenue_by_interval,
     create_product,
     get_inventory_changes_by_time_range,
     get_inventory_status,
     get_sales_data,
+    get_sales_velocity,
+    get_top_sellers,
+    record_sale,
     update_inventory,
 )
 
@@ -19,9 +21,13 @@ from schemas.schemas import (
     ProductCreateRequest,
     ProductCreateResponse,
     RevenueResponse,
+    SaleCreateRequest,
+    SalesDataBase,
     SalesDataResponse,
+    SalesVelocityResponse,
+    TopSellersResponse,
 )
-from utils.utilities import valid_start_end_dates
+from utils.utilities import validate_date, validate_timezone, valid_start_end_dates
 from sqlalchemy.orm import Session
 from fastapi import Depends, HTTPException, APIRouter
 from db.database import get_db
@@ -52,25 +58,116 @@ def get_sales(
     return {"sales_data": sales_data}
 
 
+@router.post("/sales/", response_model=SalesDataBase)
+def register_sale(
+    request_data: SaleCreateRequest,
+    db: Session = Depends(get_db),
+):
+    return record_sale(db, request_data.product_name, request_data.quantity_sold)
+
+
+@router.get("/sales/top/", response_model=TopSellersResponse)
+def get_top_sales(
+    metric: Annotated[str, Query(description="Rank by (units, revenue)")] = "units",
+    group_by: Annotated[
+        str, Query(description="Group by (product, category)")
+    ] = "product",
+    window: Annotated[str, Query(description="Live window (today, last_24h)")] = None,
+    start_date: Annotated[str, Query(description="Start date (YYYY-MM-DD)")] = None,
+    end_date: Annotated[str, Query(description="End date (YYYY-MM-DD)")] = None,
+    category_name: Annotated[str, Query(description="Category name")] = None,
+    per_category: Annotated[
+        bool, Query(description="Rank separately within each category")
+    ] = False,
+    limit: Annotated[int, Query(description="Number of leaders", ge=1)] = 10,
+    timezone: Annotated[
+        str, Query(description="Time zone used to align days (e.g. UTC)")
+    ] = "UTC",
+    db: Session = Depends(get_db),
+):
+    if not valid_start_end_dates(start_date, end_date):
+        raise HTTPException(
+            status_code=400, detail="Invalid start_date or end_date (YYYY-MM-DD)"
+        )
+
+    if not validate_timezone(timezone):
+        raise HTTPException(status_code=400, detail="Invalid timezone")
+
+    top_sellers = get_top_sellers(
+        db,
+        metric,
+        group_by,
+        window,
+        start_date,
+        end_date,
+        category_name,
+        per_category,
+        limit,
+        timezone,
+    )
+
+    return {"top_sellers": top_sellers}
+
+
+@router.get("/sales/velocity/", response_model=SalesVelocityResponse)
+def get_sales_velocity_forecast(
+    as_of_date: Annotated[
+        str, Query(description="Forecast reference date (YYYY-MM-DD)")
+    ] = None,
+    window: Annotated[
+        int, Query(description="Velocity window used for projection (7, 30, 90)")
+    ] = 30,
+    category_name: Annotated[str, Query(description="Category name")] = None,
+    timezone: Annotated[
+        str, Query(description="Time zone used to align days (e.g. UTC)")
+    ] = "UTC",
+    db: Session = Depends(get_db),
+):
+    if as_of_date is not None and not validate_date(as_of_date):
+        raise HTTPException(status_code=400, detail="Invalid as_of_date (YYYY-MM-DD)")
+
+    if not validate_timezone(timezone):
+        raise HTTPException(status_code=400, detail="Invalid timezone")
+
+    sales_velocity = get_sales_velocity(
+        db, as_of_date, window, category_name, timezone
+    )
+
+    return {"sales_velocity": sales_velocity}
+
+
 @router.get("/revenue/", response_model=RevenueResponse)
 def analyze_revenue(
     start_date: Annotated[
         str, Query(description="Start date (YYYY-MM-DD)")
     ] = "2020-01-01",
-    end_date: Annotated[str, Query(description="End date (YYYY-MM-DD)")] = date.today(),
+    end_date: Annotated[
+        str, Query(description="End date (YYYY-MM-DD), defaults to today")
+    ] = None,
     interval: Annotated[
-        str, Query(description="Filter on basis (daily, weekly, monthly, annual)")
+        str,
+        Query(
+            description="Filter on basis (daily, weekly, monthly, quarterly, annual)"
+        ),
     ] = "annual",
     category_name: Annotated[str, Query(description="Category name")] = None,
+    timezone: Annotated[
+        str, Query(description="Time zone used to align intervals (e.g. UTC)")
+    ] = "UTC",
     db: Session = Depends(get_db),
 ):
-    if not valid_start_end_dates(start_date, end_date):
+    if not validate_date(start_date) or not valid_start_end_dates(
+        start_date, end_date
+    ):
         raise HTTPException(
             status_code=400, detail="Invalid start_date or end_date (YYYY-MM-DD)"
         )
 
+    if not validate_timezone(timezone):
+        raise HTTPException(status_code=400, detail="Invalid timezone")
+
     revenue_data = calculate_revenue_by_interval(
-        db, start_date, end_date, interval, category_name
+        db, start_date, end_date, interval, category_name, timezone
     )
 
     return {"revenue_data": revenue_data}
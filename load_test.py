@@ -0,0 +1,542 @@
+"""
+Local load and soak test for the admin API.
+
+Seeds a scratch SQLite database, starts the app under uvicorn against it and
+drives a configurable read/write mix with concurrent async HTTP clients. When
+the run ends it reports throughput, latency percentiles, `database is locked`
+errors and lost inventory updates as JSON.
+
+Example:
+    python load_test.py --duration 60 --concurrency 32 --write-ratio 0.3 \\
+        --profile ramp --ramp-up 20 --output results.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+import httpx
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from db.database import Base
+from models.models import Category, Inventory, InventoryChangeLog, Product, Sale
+from utils.utilities import utc_now
+
+API_PREFIX = "/api/admin"
+CATEGORIES = ["electronics", "furniture", "cars", "kitchen"]
+INITIAL_STOCK = 1_000_000
+LOCKED_MESSAGE = "database is locked"
+LOCKED_ERROR_PREFIX = "sqlalchemy.exc.OperationalError"
+
+READ_OPERATIONS = {
+    "inventory_status": 3,
+    "sales_velocity": 2,
+    "top_sellers_live": 3,
+    "top_sellers_range": 1,
+    "revenue": 1,
+}
+
+WRITE_OPERATIONS = {
+    "update_inventory": 5,
+    "record_sale": 4,
+    "create_product": 1,
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds")
+    parser.add_argument("--concurrency", type=int, default=16, help="Max clients")
+    parser.add_argument(
+        "--write-ratio",
+        type=float,
+        default=0.2,
+        help="Fraction of requests that write (0.0 - 1.0)",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=["constant", "ramp", "step"],
+        default="constant",
+        help="How the number of active clients evolves over the run",
+    )
+    parser.add_argument(
+        "--ramp-up", type=float, default=10.0, help="Seconds to reach concurrency"
+    )
+    parser.add_argument("--products", type=int, default=20, help="Seeded products")
+    parser.add_argument(
+        "--history-days", type=int, default=90, help="Days of seeded sales history"
+    )
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers")
+    parser.add_argument("--port", type=int, default=None, help="Server port")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed")
+    parser.add_argument(
+        "--database", default=None, help="New SQLite file to seed (default: temp)"
+    )
+    parser.add_argument(
+        "--output", default=None, help="Write JSON results here (default: stdout)"
+    )
+    return parser.parse_args()
+
+
+def active_clients(profile, elapsed, ramp_up, concurrency):
+    if profile == "constant" or ramp_up <= 0 or elapsed >= ramp_up:
+        return concurrency
+
+    if profile == "ramp":
+        return max(1, math.ceil(concurrency * elapsed / ramp_up))
+
+    # step: four equal plateaus over the ramp-up period
+    steps = 4
+    step = math.floor(elapsed / ramp_up * steps) + 1
+    return max(1, math.ceil(concurrency * step / steps))
+
+
+def seed_database(database_url, product_count, history_days, rng):
+    engine = create_engine(database_url)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    try:
+        categories = [Category(name=name) for name in CATEGORIES]
+        db.add_all(categories)
+        db.commit()
+
+        products = [
+            Product(
+                name=f"product-{index}",
+                description="Load test product",
+                price=round(rng.uniform(5, 500), 2),
+                category_id=categories[index % len(categories)].id,
+            )
+            for index in range(product_count)
+        ]
+        db.add_all(products)
+        db.commit()
+
+        db.bulk_save_objects(
+            [
+                Inventory(
+                    product_id=product.id,
+                    current_stock=INITIAL_STOCK,
+                    low_stock_alert_threshold=10,
+                )
+                for product in products
+            ]
+        )
+
+        today = utc_now().replace(hour=0, minute=0, second=0, microsecond=0)
+        db.bulk_save_objects(
+            [
+                Sale(
+                    product_id=product.id,
+                    sale_timestamp=today
+                    - timedelta(days=day, minutes=rng.randint(0, 1439)),
+                    quantity_sold=rng.randint(1, 10),
+                )
+                for product in products
+                for day in range(1, history_days + 1)
+            ]
+        )
+        db.commit()
+
+        return {product.name: INITIAL_STOCK for product in products}
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(database_url, port, workers, log_file):
+    env = dict(os.environ, DATABASE_URL=database_url)
+    return subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "main:app",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+        ],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+        stdout=log_file,
+        stderr=subprocess.STDOUT,
+    )
+
+
+async def wait_for_server(base_url, server, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise RuntimeError("uvicorn exited before accepting connections")
+            try:
+                await client.get("/openapi.json")
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+
+    raise RuntimeError("Timed out waiting for uvicorn to start")
+
+
+class LoadTest:
+    def __init__(self, args, client, stock, rng):
+        self.args = args
+        self.client = client
+        self.rng = rng
+        self.products = list(stock)
+        self.initial_stock = dict(stock)
+        self.acknowledged = defaultdict(int)
+        self.unconfirmed = defaultdict(list)
+        self.unconfirmed_writes = 0
+        self.samples = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.server_errors = 0
+        self.transport_errors = 0
+        self.created = 0
+
+    def choose(self, operations):
+        names = list(operations)
+        return self.rng.choices(names, weights=[operations[n] for n in names])[0]
+
+    def request_for(self, operation):
+        product_name = self.rng.choice(self.products)
+        category_name = self.rng.choice(CATEGORIES)
+
+        if operation == "inventory_status":
+            return "GET", "/inventory/", {}, None
+        if operation == "sales_velocity":
+            return "GET", "/sales/velocity/", {"window": 7}, None
+        if operation == "top_sellers_live":
+            window = self.rng.choice(["today", "last_24h"])
+            return "GET", "/sales/top/", {"window": window}, None
+        if operation == "top_sellers_range":
+            end = utc_now().date()
+            params = {
+                "start_date": (end - timedelta(days=30)).isoformat(),
+                "end_date": end.isoformat(),
+                "metric": "revenue",
+                "per_category": True,
+            }
+            return "GET", "/sales/top/", params, None
+        if operation == "revenue":
+            end = utc_now().date()
+            start = end - timedelta(days=self.args.history_days)
+            params = {
+                "start_date": start.isoformat(),
+                "end_date": end.isoformat(),
+                "interval": "weekly",
+                "category_name": category_name,
+            }
+            return "GET", "/revenue/", params, None
+        if operation == "update_inventory":
+            params = {
+                "product_name": product_name,
+                "quantity_to_add": self.rng.randint(-20, 50),
+            }
+            return "POST", "/inventory/update/", params, None
+        if operation == "record_sale":
+            body = {
+                "product_name": product_name,
+                "quantity_sold": self.rng.randint(1, 5),
+            }
+            return "POST", "/sales/", {}, body
+        if operation == "create_product":
+            self.created += 1
+            body = {
+                "name": f"load-{os.getpid()}-{self.created}-{self.rng.random():.8f}",
+                "description": "Created during load test",
+                "price": round(self.rng.uniform(5, 500), 2),
+                "category_name": category_name,
+                "initial_stock": 100,
+                "low_stock_alert_threshold": 10,
+            }
+            return "POST", "/products/", {}, body
+
+        raise ValueError(f"Unknown operation: {operation}")
+
+    def acknowledge(self, operation, params, body):
+        if operation == "update_inventory":
+            self.acknowledged[params["product_name"]] += params["quantity_to_add"]
+        elif operation == "record_sale":
+            self.acknowledged[body["product_name"]] -= body["quantity_sold"]
+        elif operation == "create_product":
+            self.initial_stock[body["name"]] = body["initial_stock"]
+
+    def unconfirmed_write(self, operation, params, body):
+        # The write may or may not have been committed (5xx or no response).
+        if operation not in WRITE_OPERATIONS:
+            return
+
+        self.unconfirmed_writes += 1
+        if operation == "update_inventory":
+            self.unconfirmed[params["product_name"]].append(params["quantity_to_add"])
+        elif operation == "record_sale":
+            self.unconfirmed[body["product_name"]].append(-body["quantity_sold"])
+
+    async def run_operation(self):
+        if self.rng.random() < self.args.write_ratio:
+            operation = self.choose(WRITE_OPERATIONS)
+        else:
+            operation = self.choose(READ_OPERATIONS)
+
+        method, path, params, body = self.request_for(operation)
+
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(
+                method, API_PREFIX + path, params=params, json=body
+            )
+        except httpx.TransportError:
+            self.transport_errors += 1
+            self.statuses[operation]["transport_error"] += 1
+            self.unconfirmed_write(operation, params, body)
+            return
+        latency = time.perf_counter() - started
+
+        self.samples[operation].append(latency)
+        self.statuses[operation][str(response.status_code)] += 1
+
+        if response.status_code >= 500:
+            self.server_errors += 1
+            self.unconfirmed_write(operation, params, body)
+        elif response.status_code == 200:
+            self.acknowledge(operation, params, body)
+
+    async def client_loop(self, index, started, deadline):
+        while time.monotonic() < deadline:
+            elapsed = time.monotonic() - started
+            active = active_clients(
+                self.args.profile, elapsed, self.args.ramp_up, self.args.concurrency
+            )
+            if index >= active:
+                await asyncio.sleep(0.05)
+                continue
+            await self.run_operation()
+
+    async def run(self):
+        started = time.monotonic()
+        deadline = started + self.args.duration
+        await asyncio.gather(
+            *[
+                self.client_loop(index, started, deadline)
+                for index in range(self.args.concurrency)
+            ]
+        )
+        return time.monotonic() - started
+
+
+def latency_summary(samples):
+    if not samples:
+        return {"count": 0}
+
+    latencies = np.array(samples) * 1000.0
+    p50, p90, p95, p99 = np.percentile(latencies, [50, 90, 95, 99])
+    return {
+        "count": len(samples),
+        "mean_ms": float(latencies.mean()),
+        "p50_ms": float(p50),
+        "p90_ms": float(p90),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "max_ms": float(latencies.max()),
+    }
+
+
+def check_lost_updates(
+    database_url, initial_stock, acknowledged, unconfirmed, unconfirmed_writes
+):
+    """
+    Compare final stock with acknowledged writes and replay the change log.
+
+    A stock mismatch means an acknowledged write was overwritten; a change log
+    entry whose new_quantity does not follow from the previous entry means two
+    writers read the same stock level before updating it. Mismatches on
+    products that also had writes without a confirmed outcome (5xx or no
+    response) are reported separately, since those writes may have committed.
+    """
+    engine = create_engine(database_url)
+    db = sessionmaker(bind=engine)()
+
+    try:
+        products = {
+            product.id: product.name
+            for product in db.query(Product).filter(
+                Product.name.in_(list(initial_stock))
+            )
+        }
+        stock = {
+            products[inventory.product_id]: inventory.current_stock
+            for inventory in db.query(Inventory).filter(
+                Inventory.product_id.in_(list(products))
+            )
+        }
+
+        stock_mismatches = []
+        unconfirmed_mismatches = []
+        for name, initial in initial_stock.items():
+            expected = initial + acknowledged.get(name, 0)
+            actual = stock.get(name)
+            if actual == expected:
+                continue
+
+            mismatch = {"product_name": name, "expected": expected, "actual": actual}
+            if unconfirmed.get(name):
+                mismatch["unconfirmed_changes"] = unconfirmed[name]
+                unconfirmed_mismatches.append(mismatch)
+            else:
+                stock_mismatches.append(mismatch)
+
+        changelog_breaks = 0
+        changelog_entries = 0
+        previous = {name: initial_stock[name] for name in products.values()}
+        for change in (
+            db.query(InventoryChangeLog)
+            .filter(InventoryChangeLog.product_id.in_(list(products)))
+            .order_by(InventoryChangeLog.id)
+        ):
+            name = products[change.product_id]
+            changelog_entries += 1
+            if change.new_quantity - change.quantity_change != previous[name]:
+                changelog_breaks += 1
+            previous[name] = change.new_quantity
+
+        return {
+            "products_checked": len(initial_stock),
+            "stock_mismatches": stock_mismatches,
+            "lost_units": sum(
+                abs(item["expected"] - (item["actual"] or 0))
+                for item in stock_mismatches
+            ),
+            "unconfirmed_writes": unconfirmed_writes,
+            "unconfirmed_mismatches": unconfirmed_mismatches,
+            "changelog_entries": changelog_entries,
+            "changelog_breaks": changelog_breaks,
+        }
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def count_locked_in_log(log_path):
+    # Each failed request logs the message for the sqlite3 error and again
+    # for the chained SQLAlchemy error; only count the latter.
+    with open(log_path, encoding="utf-8", errors="replace") as log_file:
+        return sum(
+            1
+            for line in log_file
+            if line.startswith(LOCKED_ERROR_PREFIX) and LOCKED_MESSAGE in line
+        )
+
+
+async def run_load_test(args):
+    rng = random.Random(args.seed)
+    workdir = tempfile.mkdtemp(prefix="ecommerce-load-")
+    database_path = args.database or os.path.join(workdir, "load_test.db")
+    database_url = f"sqlite:///{os.path.abspath(database_path)}"
+    log_path = os.path.join(workdir, "server.log")
+    port = args.port or free_port()
+    base_url = f"http://127.0.0.1:{port}"
+
+    if os.path.exists(database_path):
+        raise SystemExit(f"Refusing to seed existing database: {database_path}")
+
+    stock = seed_database(database_url, args.products, args.history_days, rng)
+
+    with open(log_path, "w") as log_file:
+        server = start_server(database_url, port, args.workers, log_file)
+        try:
+            await wait_for_server(base_url, server)
+
+            limits = httpx.Limits(max_connections=args.concurrency)
+            async with httpx.AsyncClient(
+                base_url=base_url, limits=limits, timeout=30.0
+            ) as client:
+                load_test = LoadTest(args, client, stock, rng)
+                elapsed = await load_test.run()
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+
+    all_samples = [
+        latency for samples in load_test.samples.values() for latency in samples
+    ]
+    total_requests = len(all_samples) + load_test.transport_errors
+
+    return {
+        "config": vars(args),
+        "database": database_path,
+        "server_log": log_path,
+        "elapsed_seconds": elapsed,
+        "total_requests": total_requests,
+        "throughput_rps": total_requests / elapsed if elapsed else 0.0,
+        "latency": latency_summary(all_samples),
+        "operations": {
+            operation: {
+                **latency_summary(load_test.samples[operation]),
+                "statuses": dict(load_test.statuses[operation]),
+            }
+            for operation in sorted(load_test.statuses)
+        },
+        "server_errors": load_test.server_errors,
+        "transport_errors": load_test.transport_errors,
+        "database_locked_errors": count_locked_in_log(log_path),
+        "lost_updates": check_lost_updates(
+            database_url,
+            load_test.initial_stock,
+            load_test.acknowledged,
+            load_test.unconfirmed,
+            load_test.unconfirmed_writes,
+        ),
+    }
+
+
+def main():
+    args = parse_args()
+    results = asyncio.run(run_load_test(args))
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(output + "\n")
+    else:
+        print(output)
+
+    lost = results["lost_updates"]
+    print(
+        f"{results['total_requests']} requests in {results['elapsed_seconds']:.1f}s "
+        f"({results['throughput_rps']:.1f} req/s), "
+        f"p99 {results['latency'].get('p99_ms', 0.0):.1f} ms, "
+        f"{results['database_locked_errors']} locked errors, "
+        f"{len(lost['stock_mismatches'])} stock mismatches "
+        f"(+{len(lost['unconfirmed_mismatches'])} unconfirmed), "
+        f"{lost['changelog_breaks']} change log breaks",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
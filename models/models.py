@@ -31,8 +31,8 @@ class Sale(Base):
     __tablename__ = "sales"
 
     id = Column(Integer, primary_key=True, index=True)
-    product_id = Column(Integer, ForeignKey("products.id"))
-    sale_timestamp = Column(DateTime(timezone=True))
+    product_id = Column(Integer, ForeignKey("products.id"), index=True)
+    sale_timestamp = Column(DateTime(timezone=True), index=True)
     quantity_sold = Column(Integer)
 
     product = relationship("Product", back_populates="sales")
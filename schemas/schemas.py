@@ -12,6 +12,38 @@ class SalesDataResponse(BaseModel):
     sales_data: List[SalesDataBase]
 
 
+class SaleCreateRequest(BaseModel):
+    product_name: str
+    quantity_sold: int
+
+
+class TopSellerBase(BaseModel):
+    rank: int
+    name: str
+    category_name: str | None
+    units_sold: int
+    revenue: float
+
+
+class TopSellersResponse(BaseModel):
+    top_sellers: List[TopSellerBase]
+
+
+class SalesVelocityBase(BaseModel):
+    product_id: int
+    product_name: str
+    current_stock: int
+    velocity_7d: float
+    velocity_30d: float
+    velocity_90d: float
+    days_of_stock_remaining: float | None
+    projected_stock_out_date: str | None
+
+
+class SalesVelocityResponse(BaseModel):
+    sales_velocity: List[SalesVelocityBase]
+
+
 class RevenueBase(BaseModel):
     revenue_per_interval: Dict[str, float]
     average_revenue: float
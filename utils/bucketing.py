@@ -0,0 +1,143 @@
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+
+BUCKET_INTERVALS = ("daily", "weekly", "monthly", "quarterly", "annual")
+
+
+def bucket_edges(start: date, end: date, interval: str):
+    """
+    Calendar-aligned bucket boundaries covering ``start`` to ``end`` inclusive.
+
+    Returns ``n + 1`` ``datetime64[D]`` edges: the start of every bucket that
+    overlaps the range followed by the start of the bucket after the last one.
+    Weeks start on Monday (ISO), quarters on January, April, July and October.
+    """
+    first = np.datetime64(start, "D")
+    last = np.datetime64(end, "D")
+
+    if interval == "daily":
+        return np.arange(first, last + 2, dtype="datetime64[D]")
+
+    if interval == "weekly":
+        # 1970-01-01 was a Thursday, so shift by 3 days to align on Mondays.
+        offset = (first.astype(np.int64) + 3) % 7
+        first_monday = first - offset
+        return np.arange(first_monday, last + 8, 7, dtype="datetime64[D]")
+
+    if interval == "monthly":
+        months = np.arange(
+            first.astype("datetime64[M]"),
+            last.astype("datetime64[M]") + 2,
+            dtype="datetime64[M]",
+        )
+        return months.astype("datetime64[D]")
+
+    if interval == "quarterly":
+        first_month = first.astype("datetime64[M]")
+        first_quarter = first_month - first_month.astype(np.int64) % 3
+        months = np.arange(
+            first_quarter,
+            last.astype("datetime64[M]") + 4,
+            3,
+            dtype="datetime64[M]",
+        )
+        return months.astype("datetime64[D]")
+
+    if interval == "annual":
+        years = np.arange(
+            first.astype("datetime64[Y]"),
+            last.astype("datetime64[Y]") + 2,
+            dtype="datetime64[Y]",
+        )
+        return years.astype("datetime64[D]")
+
+    raise ValueError(f"Unknown interval: {interval}")
+
+
+def bucket_labels(edges, interval: str):
+    """Human readable label for each bucket described by ``edges``."""
+    labels = []
+    for bucket_start in edges[:-1].astype(object):
+        if interval == "weekly":
+            label = bucket_start.strftime("%G-W%V")
+        elif interval == "monthly":
+            label = bucket_start.strftime("%Y-%m")
+        elif interval == "quarterly":
+            label = f"{bucket_start.year}-Q{(bucket_start.month - 1) // 3 + 1}"
+        elif interval == "annual":
+            label = bucket_start.strftime("%Y")
+        else:
+            label = bucket_start.strftime("%Y-%m-%d")
+        labels.append(label)
+
+    return labels
+
+
+def local_today(tz_name: str = "UTC"):
+    """Current calendar day in ``tz_name``."""
+    return datetime.now(ZoneInfo(tz_name)).date()
+
+
+def local_midnight_utc(day: date, tz_name: str = "UTC"):
+    """
+    Naive UTC datetime of midnight at the start of ``day`` in ``tz_name``.
+
+    Stored timestamps are naive UTC, so this is the instant to compare them
+    against when a day boundary is meant in a local time zone.
+    """
+    return (
+        datetime.combine(day, datetime.min.time(), tzinfo=ZoneInfo(tz_name))
+        .astimezone(timezone.utc)
+        .replace(tzinfo=None)
+    )
+
+
+def localize_edges(edges, tz_name: str = "UTC"):
+    """
+    Convert local-midnight day edges into naive UTC ``datetime64[us]`` instants.
+
+    Only the handful of edges is converted one by one; timestamps are then
+    compared against the result in bulk, which keeps DST transitions exact.
+    """
+    instants = [local_midnight_utc(day, tz_name) for day in edges.astype(object)]
+    return np.array(instants, dtype="datetime64[us]")
+
+
+def assign_buckets(timestamps, edges):
+    """
+    Bucket index of every timestamp, ``-1`` for values outside the edges.
+    """
+    timestamps = np.asarray(timestamps, dtype="datetime64[us]")
+    indices = np.searchsorted(edges, timestamps, side="right") - 1
+    indices[(indices < 0) | (indices >= len(edges) - 1)] = -1
+    return indices
+
+
+def sum_by_bucket(timestamps, values, edges):
+    """
+    Sum ``values`` per bucket, returning zeros for buckets without data.
+    """
+    bucket_count = len(edges) - 1
+    if len(timestamps) == 0:
+        return np.zeros(bucket_count)
+
+    indices = assign_buckets(timestamps, edges)
+    in_range = indices >= 0
+    return np.bincount(
+        indices[in_range],
+        weights=np.asarray(values, dtype=float)[in_range],
+        minlength=bucket_count,
+    )
+
+
+def clip_edges(edges, start: date, end: date):
+    """
+    Clip the outer edges to the requested ``start``/``end`` day range.
+    """
+    clipped = edges.copy()
+    clipped[0] = max(clipped[0], np.datetime64(start, "D"))
+    clipped[-1] = min(clipped[-1], np.datetime64(end + timedelta(days=1), "D"))
+    return clipped
@@ -0,0 +1,174 @@
+import heapq
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from utils.utilities import utc_now
+
+
+LEADERBOARD_WINDOWS = ("today", "last_24h")
+LEADERBOARD_METRICS = ("units", "revenue")
+
+
+class _WindowTotals:
+    def __init__(self):
+        self.units = defaultdict(int)
+        self.revenue = defaultdict(float)
+
+    def add(self, key, units, revenue):
+        self.units[key] += units
+        self.revenue[key] += revenue
+
+    def remove(self, key, units, revenue):
+        self.units[key] -= units
+        self.revenue[key] -= revenue
+        if self.units[key] <= 0:
+            del self.units[key]
+            del self.revenue[key]
+
+    def clear(self):
+        self.units.clear()
+        self.revenue.clear()
+
+
+class SalesLeaderboard:
+    """
+    In-memory running totals for the "today" (UTC day) and "last_24h" windows.
+
+    Sales are pushed onto a min-heap keyed by timestamp as they are ingested
+    and expired lazily, so a ranking costs a heap selection over the products
+    sold in the window instead of a scan of the sales history.
+
+    Sales written by other processes are picked up by ``sync``, which only
+    loads sale ids above the highest one already seen.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._events = []
+        self._day = None
+        self._last_sale_id = None
+        self._recorded_ids = set()
+        self._totals = {window: _WindowTotals() for window in LEADERBOARD_WINDOWS}
+
+    def sync(self, load_sales, now: datetime = None):
+        """
+        Catch up with sales stored since the last sync.
+
+        ``load_sales(last_sale_id)`` returns ``(rows, high_water_id)`` where rows
+        are ``(id, timestamp, product, category, units, revenue)`` tuples with
+        ids up to ``high_water_id``. ``last_sale_id`` is None on a cold start,
+        in which case the loader should return the last 24 hours of sales.
+        """
+        now = now or utc_now()
+        with self._lock:
+            rows, high_water_id = load_sales(self._last_sale_id)
+            for sale_id, *event in rows:
+                if sale_id not in self._recorded_ids:
+                    self._add(tuple(event), now)
+
+            self._last_sale_id = max(self._last_sale_id or 0, high_water_id or 0)
+            self._recorded_ids = {
+                sale_id
+                for sale_id in self._recorded_ids
+                if sale_id > self._last_sale_id
+            }
+
+    def record_sale(
+        self,
+        sale_id,
+        timestamp,
+        product,
+        category,
+        units,
+        revenue,
+        now: datetime = None,
+    ):
+        now = now or utc_now()
+        with self._lock:
+            # Not synced yet, or already loaded by a sync: nothing to add.
+            if self._last_sale_id is None or sale_id <= self._last_sale_id:
+                return
+            self._recorded_ids.add(sale_id)
+            self._add((timestamp, product, category, units, revenue), now)
+
+    def top(
+        self,
+        window: str,
+        metric: str,
+        limit: int,
+        group_by: str = "product",
+        category: str = None,
+        per_category: bool = False,
+        now: datetime = None,
+    ):
+        now = now or utc_now()
+        with self._lock:
+            self._expire(now)
+            totals = self._totals[window]
+            units = totals.units
+            revenue = totals.revenue
+
+            grouped_units = defaultdict(int)
+            grouped_revenue = defaultdict(float)
+            for (product, product_category), product_units in units.items():
+                if category is not None and product_category != category:
+                    continue
+                key = product if group_by == "product" else product_category
+                grouped_units[(key, product_category)] += product_units
+                grouped_revenue[(key, product_category)] += revenue[
+                    (product, product_category)
+                ]
+
+        scores = grouped_units if metric == "units" else grouped_revenue
+        partitions = defaultdict(list)
+        for key, score in scores.items():
+            partitions[key[1] if per_category else None].append((key, score))
+
+        result = []
+        for partition in sorted(partitions, key=lambda name: name or ""):
+            leaders = heapq.nlargest(
+                limit, partitions[partition], key=lambda item: item[1]
+            )
+            result.extend(
+                {
+                    "rank": rank,
+                    "name": name,
+                    "category_name": product_category,
+                    "units_sold": grouped_units[(name, product_category)],
+                    "revenue": grouped_revenue[(name, product_category)],
+                }
+                for rank, ((name, product_category), _) in enumerate(
+                    leaders, start=1
+                )
+            )
+
+        return result
+
+    def _add(self, event, now):
+        timestamp, product, category, units, revenue = event
+        self._expire(now)
+        key = (product, category)
+
+        if now - timestamp < timedelta(hours=24):
+            heapq.heappush(self._events, event)
+            self._totals["last_24h"].add(key, units, revenue)
+        if timestamp.date() == self._day:
+            self._totals["today"].add(key, units, revenue)
+
+    def _expire(self, now: datetime):
+        if self._day != now.date():
+            self._day = now.date()
+            self._totals["today"].clear()
+            for event in self._events:
+                timestamp, product, category, units, revenue = event
+                if timestamp.date() == self._day:
+                    self._totals["today"].add((product, category), units, revenue)
+
+        cutoff = now - timedelta(hours=24)
+        while self._events and self._events[0][0] <= cutoff:
+            _, product, category, units, revenue = heapq.heappop(self._events)
+            self._totals["last_24h"].remove((product, category), units, revenue)
+
+
+sales_leaderboard = SalesLeaderboard()
@@ -1,4 +1,5 @@
-from datetime import datetime
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 
 def validate_date(date_str):
@@ -20,22 +21,14 @@ def valid_start_end_dates(start_date, end_date):
     return True
 
 
-def get_interval_duration_and_format(interval):
-    interval_duration = None
-    interval_format = None
-
-    if interval == "daily":
-        interval_duration = 1
-        interval_format = "%Y-%m-%d"
-    elif interval == "weekly":
-        interval_duration = 7
-        interval_duration = "%Y-%m-%d"
-    elif interval == "monthly":
-        interval_duration = 30
-        interval_format = "%Y-%m"
-    elif interval == "annual":
-        interval_duration = 365
-        interval_format = "%Y"
-        return 365, "%Y"
-
-    return interval_duration, interval_format
+def utc_now():
+    """Current time as a naive UTC datetime, the format timestamps are stored in."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def validate_timezone(tz_name):
+    try:
+        ZoneInfo(tz_name)
+        return True
+    except (ValueError, ZoneInfoNotFoundError):
+        return False